@@ -10,16 +10,17 @@ import subprocess
 import platform
 from pathlib import Path
 
-def run_command(command, shell=True):
+def run_command(command, shell=True, capture_output=True):
     """Run a command and handle errors."""
     try:
-        result = subprocess.run(command, shell=shell, check=True, 
-                              capture_output=True, text=True)
+        result = subprocess.run(command, shell=shell, check=True,
+                              capture_output=capture_output, text=True)
         print(f"✓ {command}")
         return result
     except subprocess.CalledProcessError as e:
         print(f"✗ Error running: {command}")
-        print(f"Error: {e.stderr}")
+        if e.stderr:
+            print(f"Error: {e.stderr}")
         return None
 
 def check_python_version():
@@ -53,13 +54,6 @@ def get_activation_command():
     else:
         return "source venv/bin/activate"
 
-def get_pip_command():
-    """Get the correct pip command for the virtual environment."""
-    if platform.system() == "Windows":
-        return "venv\\Scripts\\pip"
-    else:
-        return "venv/bin/pip"
-
 def get_python_command():
     """Get the correct python command for the virtual environment."""
     if platform.system() == "Windows":
@@ -67,29 +61,27 @@ def get_python_command():
     else:
         return "venv/bin/python"
 
-def upgrade_pip():
-    """Upgrade pip in the virtual environment."""
-    print("Upgrading pip...")
-    pip_cmd = get_pip_command()
-    result = run_command(f"{pip_cmd} install --upgrade pip")
-    if result:
-        print("✓ Pip upgraded successfully")
-        return True
-    return False
-
-def install_requirements():
-    """Install requirements from requirements.txt."""
+def install_dependencies():
+    """Upgrade pip and install all requirements in a single pip run."""
     requirements_file = Path("requirements.txt")
-    
+
     if not requirements_file.exists():
         print("❌ requirements.txt not found")
         return False
-    
-    print("Installing requirements...")
-    pip_cmd = get_pip_command()
-    result = run_command(f"{pip_cmd} install -r requirements.txt")
+
+    print("Installing dependencies...")
+    python_cmd = get_python_command()
+    # One pip invocation for pip itself, the requirements and ipykernel:
+    # each extra run pays interpreter cold-start plus pip's own import
+    # and resolver cost. Output is streamed, not buffered, so pip's
+    # progress is visible during the long install.
+    result = run_command(
+        f"{python_cmd} -m pip install --upgrade --no-input --disable-pip-version-check "
+        f"pip -r requirements.txt ipykernel",
+        capture_output=False
+    )
     if result:
-        print("✓ Requirements installed successfully")
+        print("✓ Dependencies installed successfully")
         return True
     return False
 
@@ -116,14 +108,9 @@ def main():
         print("❌ Failed to create virtual environment")
         sys.exit(1)
     
-    # Upgrade pip
-    if not upgrade_pip():
-        print("❌ Failed to upgrade pip")
-        sys.exit(1)
-    
-    # Install requirements
-    if not install_requirements():
-        print("❌ Failed to install requirements")
+    # Upgrade pip and install requirements + ipykernel in one pip run
+    if not install_dependencies():
+        print("❌ Failed to install dependencies")
         sys.exit(1)
     
     # Install Jupyter kernel
@@ -5,14 +5,33 @@ Supports both AWS profile and IAM role authentication.
 """
 
 import argparse
+import concurrent.futures
+import os
 import sys
-import boto3
-import pandas as pd
-import pyarrow.parquet as pq
-import pyarrow as pa
-from botocore.exceptions import ClientError, NoCredentialsError
 from urllib.parse import urlparse
 import logging
+import tempfile
+from pathlib import Path
+
+# boto3, botocore and pyarrow cost several hundred ms of interpreter
+# startup between them; they are imported inside the functions that use
+# them so --help and URL-parse errors return immediately
+
+# On-disk cache for downloaded parquet files, keyed by S3 ETag so a
+# changed object never hits a stale entry. Repeated views of the same
+# file run at local-FS speed via memory-mapped zero-copy reads.
+CACHE_DIR = Path.home() / '.cache' / 'ais_parquet_query'
+
+# Coalescing for remote ranged reads: gaps under 1 MB between wanted
+# column chunks are fetched as part of one request rather than paying
+# another S3 round-trip, and requests are capped at 32 MB.
+RANGE_HOLE_SIZE_LIMIT = 1 << 20
+RANGE_SIZE_LIMIT = 32 << 20
+
+# Read buffer size for streaming parquet reads. A 1 MB buffered stream
+# keeps peak memory at buffer size instead of row-group size (which can
+# exceed 1 GB on large AIS files) without a measurable throughput cost.
+PARQUET_BUFFER_SIZE = 1 << 20
 
 def setup_logging():
     """Set up logging configuration."""
@@ -22,6 +41,45 @@ def setup_logging():
         datefmt='%Y-%m-%d %H:%M:%S'
     )
 
+def setup_memory_pool():
+    """
+    Route Arrow allocations through a jemalloc-backed pool.
+
+    jemalloc handles the large allocations a parquet load makes better
+    than glibc malloc, and the pool tracks bytes_allocated so memory use
+    can be logged and an exhausted pool surfaces as a clean Arrow error
+    instead of the kernel OOM killer.
+
+    Returns:
+        pyarrow.MemoryPool (also installed as Arrow's default pool)
+    """
+    import pyarrow as pa
+
+    try:
+        pool = pa.jemalloc_memory_pool()
+    except NotImplementedError:
+        # pyarrow build without jemalloc (e.g. Windows wheels)
+        pool = pa.system_memory_pool()
+    pa.set_memory_pool(pool)
+    return pool
+
+def setup_thread_pools():
+    """
+    Size Arrow's thread pools to the machine.
+
+    Parquet decode (decompression + decoding) parallelizes per column
+    chunk on the CPU pool, and remote reads overlap on the I/O pool.
+    Containers often inherit a pool of 1, so set both explicitly: the
+    CPU pool to the core count and the I/O pool larger, since its
+    threads mostly wait on S3 round-trips.
+    """
+    import pyarrow as pa
+
+    cpu_count = os.cpu_count() or 1
+    pa.set_cpu_count(cpu_count)
+    pa.set_io_thread_count(min(16, 4 * cpu_count))
+    logging.debug(f"Arrow thread pools: cpu={pa.cpu_count()}, io={pa.io_thread_count()}")
+
 def get_s3_client(aws_mode='profile', aws_profile='default', region='il-central-1'):
     """
     Create and return an S3 client with appropriate authentication.
@@ -34,26 +92,39 @@ def get_s3_client(aws_mode='profile', aws_profile='default', region='il-central-
     Returns:
         boto3 S3 client
     """
+    import boto3
+    import botocore.config
+    from botocore.exceptions import NoCredentialsError
+
     try:
+        # Pool sized for the parallel ranged GETs, keepalive to avoid a
+        # TLS handshake per request, adaptive retries for S3 throttling
+        client_config = botocore.config.Config(
+            max_pool_connections=64,
+            tcp_keepalive=True,
+            retries={'mode': 'adaptive', 'max_attempts': 10},
+            signature_version='s3v4',
+            s3={'use_accelerate_endpoint':
+                os.environ.get('AWS_S3_USE_ACCELERATE_ENDPOINT', '').lower() in ('1', 'true')},
+        )
+
         if aws_mode == 'profile':
             session = boto3.Session(profile_name=aws_profile, region_name=region)
-            s3_client = session.client('s3')
+            s3_client = session.client('s3', config=client_config)
         elif aws_mode == 'role':
-            s3_client = boto3.client('s3', region_name=region)
+            s3_client = boto3.client('s3', region_name=region, config=client_config)
         else:
             raise ValueError(f"Invalid aws_mode: {aws_mode}. Must be 'profile' or 'role'")
-        
-        # Test the connection
-        s3_client.list_buckets()
-        logging.info(f"Successfully connected to S3 using {aws_mode} mode")
+
+        # No connection test here: a list_buckets round-trip costs
+        # 100-400 ms and can be denied by policy even when the object is
+        # readable. The first real request surfaces auth errors instead.
+        logging.info(f"Created S3 client using {aws_mode} mode")
         return s3_client
-        
+
     except NoCredentialsError:
         logging.error("AWS credentials not found. Please configure your credentials.")
         sys.exit(1)
-    except ClientError as e:
-        logging.error(f"Failed to connect to S3: {e}")
-        sys.exit(1)
     except Exception as e:
         logging.error(f"Unexpected error creating S3 client: {e}")
         sys.exit(1)
@@ -80,48 +151,305 @@ def parse_s3_url(s3_url):
     
     return bucket, key
 
-def read_parquet_from_s3(s3_client, bucket, key, max_rows=None):
+class S3RangeReader:
     """
-    Read parquet file from S3 and return as pandas DataFrame.
-    
+    File-like reader that serves pyarrow from S3 ranged GETs.
+
+    Parquet's footer-at-end layout means a reader only needs random
+    access: pyarrow asks for the last few bytes, then the footer, then
+    just the byte spans of the row groups and columns it actually
+    decodes. Each read() here becomes one Range GET on the boto3 client,
+    so bytes transferred stay proportional to what is read rather than
+    the object size, and the client's profile/role credentials are
+    reused as-is.
+    """
+
+    def __init__(self, s3_client, bucket, key, size=None):
+        self._s3_client = s3_client
+        self._bucket = bucket
+        self._key = key
+        if size is None:
+            head = s3_client.head_object(Bucket=bucket, Key=key)
+            size = head['ContentLength']
+        self._size = size
+        self._pos = 0
+        self.closed = False
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def writable(self):
+        return False
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=0):
+        if whence == 0:
+            self._pos = offset
+        elif whence == 1:
+            self._pos += offset
+        elif whence == 2:
+            self._pos = self._size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        return self._pos
+
+    def read(self, nbytes=None):
+        if nbytes is None:
+            nbytes = self._size - self._pos
+        nbytes = min(nbytes, self._size - self._pos)
+        if nbytes <= 0:
+            return b''
+        response = self._s3_client.get_object(
+            Bucket=self._bucket, Key=self._key,
+            Range=f"bytes={self._pos}-{self._pos + nbytes - 1}")
+        data = response['Body'].read()
+        self._pos += len(data)
+        return data
+
+    def close(self):
+        self.closed = True
+
+def parse_filter_expression(filter_expr):
+    """
+    Parse a simple filter expression into a pyarrow compute expression.
+
+    Supports expressions of the form 'column OP value' where OP is one of
+    ==, !=, <, <=, >, >= and value is a number or a (quoted) string,
+    e.g. 'mmsi == 123456789' or "nav_status == 'Under way'".
+
+    Args:
+        filter_expr: Filter expression string
+
+    Returns:
+        pyarrow.compute.Expression
+    """
+    import pyarrow.compute as pc
+
+    operators = {
+        '==': lambda f, v: f == v,
+        '!=': lambda f, v: f != v,
+        '<=': lambda f, v: f <= v,
+        '>=': lambda f, v: f >= v,
+        '<': lambda f, v: f < v,
+        '>': lambda f, v: f > v,
+    }
+
+    for op in operators:
+        if op in filter_expr:
+            column, _, value = filter_expr.partition(op)
+            column = column.strip()
+            value = value.strip().strip('\'"')
+            try:
+                value = int(value)
+            except ValueError:
+                try:
+                    value = float(value)
+                except ValueError:
+                    pass  # keep as string
+            return operators[op](pc.field(column), value)
+
+    raise ValueError(f"Invalid filter expression: {filter_expr!r}. "
+                     f"Expected 'column OP value' with OP in {list(operators)}")
+
+def download_s3_object_parallel(s3_client, bucket, key, num_chunks=8, min_parallel_size=32 * 1024 * 1024,
+                                size=None):
+    """
+    Download an S3 object using concurrent ranged GETs.
+
+    A single GET is limited by per-connection throughput; splitting the
+    object into byte ranges fetched from a thread pool uses the full
+    available bandwidth. Objects smaller than min_parallel_size are
+    fetched with a single GET.
+
+    Args:
+        s3_client: boto3 S3 client (thread-safe for concurrent reads)
+        bucket: S3 bucket name
+        key: S3 object key
+        num_chunks: Number of concurrent ranged GETs
+        min_parallel_size: Size threshold below which a single GET is used
+        size: Object size in bytes if already known (skips the HEAD)
+
+    Returns:
+        memoryview over the downloaded bytes
+    """
+    if size is None:
+        head = s3_client.head_object(Bucket=bucket, Key=key)
+        size = head['ContentLength']
+
+    if size < min_parallel_size:
+        obj = s3_client.get_object(Bucket=bucket, Key=key)
+        return memoryview(obj['Body'].read())
+
+    logging.info(f"Downloading {size:,} bytes in {num_chunks} parallel ranges")
+    buffer = bytearray(size)
+    chunk_size = size // num_chunks
+
+    def fetch_range(start, end):
+        response = s3_client.get_object(Bucket=bucket, Key=key, Range=f"bytes={start}-{end}")
+        buffer[start:end + 1] = response['Body'].read()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=num_chunks) as executor:
+        futures = []
+        for i in range(num_chunks):
+            start = i * chunk_size
+            end = size - 1 if i == num_chunks - 1 else (i + 1) * chunk_size - 1
+            futures.append(executor.submit(fetch_range, start, end))
+        for future in futures:
+            future.result()
+
+    return memoryview(buffer)
+
+def get_cached_file(s3_client, bucket, key, populate=False):
+    """
+    Return the local cache path for an S3 object, optionally filling it.
+
+    The cache is keyed by the object's ETag, so re-uploads of the same
+    key get a fresh entry and repeated views of an unchanged file skip
+    the download entirely.
+
+    Args:
+        s3_client: boto3 S3 client
+        bucket: S3 bucket name
+        key: S3 object key
+        populate: Download the object into the cache if it is not there
+
+    Returns:
+        Path to the cached file, or None if not cached and populate=False
+    """
+    head = s3_client.head_object(Bucket=bucket, Key=key)
+    cache_path = CACHE_DIR / head['ETag'].strip('"')
+
+    if cache_path.exists():
+        logging.info(f"Using cached copy: {cache_path}")
+        return cache_path
+    if not populate:
+        return None
+
+    file_buffer = download_s3_object_parallel(s3_client, bucket, key,
+                                              size=head['ContentLength'])
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    # Write to a temp file and rename so a concurrent or interrupted run
+    # never sees a half-written cache entry
+    with tempfile.NamedTemporaryFile(dir=CACHE_DIR, delete=False) as tmp:
+        tmp.write(file_buffer)
+    os.replace(tmp.name, cache_path)
+    logging.info(f"Cached s3://{bucket}/{key} at {cache_path}")
+    return cache_path
+
+def read_parquet_from_s3(s3_client, bucket, key, max_rows=None, region='il-central-1',
+                         columns=None, filter_expr=None):
+    """
+    Read parquet file from S3 and return as a pyarrow Table.
+
+    The data stays in Arrow's columnar representation; callers that need
+    pandas should convert only the slice they actually use.
+
     Args:
         s3_client: boto3 S3 client
         bucket: S3 bucket name
         key: S3 object key
         max_rows: Maximum number of rows to read (None for all)
-        
+        region: AWS region of the bucket
+        columns: List of column names to read (None for all)
+        filter_expr: Filter expression string, e.g. 'mmsi == 123456789'
+
     Returns:
-        pandas.DataFrame
+        pyarrow.Table
     """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from botocore.exceptions import ClientError
+
     try:
         logging.info(f"Reading parquet file from s3://{bucket}/{key}")
-        
-        # Read the parquet file from S3
-        obj = s3_client.get_object(Bucket=bucket, Key=key)
-        
-        # Read the entire file content into memory
-        file_content = obj['Body'].read()
-        
-        # Create a BytesIO object for pyarrow
-        import io
-        file_buffer = io.BytesIO(file_content)
-        
-        # Read parquet data using pyarrow
-        parquet_file = pq.ParquetFile(file_buffer)
-        
+
+        # Fetch the whole file into the local cache when all of it is
+        # needed anyway; partial reads just reuse a cache hit if present
+        cache_path = get_cached_file(s3_client, bucket, key,
+                                     populate=not (max_rows or filter_expr))
+
         # Read the data
-        if max_rows:
-            table = parquet_file.read(columns=None)  # Read all columns
-            # Convert to pandas and limit rows
-            df = table.to_pandas()
-            df = df.head(max_rows)
+        if filter_expr:
+            # Predicate pushdown: let Arrow's dataset scanner use the
+            # parquet footer statistics to skip row groups and column
+            # chunks that cannot match the filter
+            import pyarrow.dataset as ds
+            parquet_format = ds.ParquetFileFormat(
+                default_fragment_scan_options=ds.ParquetFragmentScanOptions(
+                    pre_buffer=True,
+                    cache_options=pa.CacheOptions(hole_size_limit=RANGE_HOLE_SIZE_LIMIT,
+                                                  range_size_limit=RANGE_SIZE_LIMIT),
+                )
+            )
+            if cache_path:
+                dataset = ds.dataset(str(cache_path), format=parquet_format)
+            else:
+                from pyarrow import fs
+                s3_fs = fs.S3FileSystem(region=region)
+                dataset = ds.dataset(f"{bucket}/{key}", format=parquet_format, filesystem=s3_fs)
+            table = dataset.to_table(columns=columns, filter=parse_filter_expression(filter_expr),
+                                     use_threads=True)
+            if max_rows:
+                table = table.slice(0, max_rows)
+        elif max_rows and not cache_path:
+            # Serve pyarrow through ranged GETs so only the byte ranges
+            # that are actually needed (footer + row groups) are fetched,
+            # instead of downloading the whole object up front.
+            # pre_buffer coalesces the column chunks of each row group
+            # into a few large ranged reads instead of one small GET per
+            # chunk - on S3 the per-request latency dominates
+            parquet_file = pq.ParquetFile(S3RangeReader(s3_client, bucket, key),
+                                          buffer_size=PARQUET_BUFFER_SIZE,
+                                          pre_buffer=True)
+
+            # Stream record batches and stop as soon as enough rows arrived,
+            # so only the first row group(s) are ever downloaded
+            batches = []
+            total_rows = 0
+            for batch in parquet_file.iter_batches(batch_size=max_rows, columns=columns):
+                batches.append(batch)
+                total_rows += batch.num_rows
+                if total_rows >= max_rows:
+                    break
+            if batches:
+                table = pa.Table.from_batches(batches)
+            else:
+                table = parquet_file.read(columns=columns)
+            table = table.slice(0, max_rows)
         else:
-            table = parquet_file.read(columns=None)
-            df = table.to_pandas()
-        
-        logging.info(f"Successfully read parquet file with {len(df)} rows and {len(df.columns)} columns")
-        return df
-        
+            # Cache hit or full read (get_cached_file downloads with the
+            # parallel ranged GETs): memory-map the local copy so Arrow
+            # reads zero-copy out of the page cache
+            parquet_file = pq.ParquetFile(pa.memory_map(str(cache_path)))
+            if max_rows:
+                # Decode row groups only until enough rows are collected
+                # instead of materializing every group and slicing after
+                group_tables = []
+                total_rows = 0
+                for i in range(parquet_file.num_row_groups):
+                    group = parquet_file.read_row_group(i, columns=columns, use_threads=True)
+                    group_tables.append(group)
+                    total_rows += group.num_rows
+                    if total_rows >= max_rows:
+                        break
+                if group_tables:
+                    table = pa.concat_tables(group_tables).slice(0, max_rows)
+                else:
+                    table = parquet_file.read(columns=columns, use_threads=True)
+            else:
+                table = parquet_file.read(columns=columns, use_threads=True)
+
+        logging.info(f"Successfully read parquet file with {table.num_rows} rows and {table.num_columns} columns")
+        return table
+
+    except FileNotFoundError:
+        logging.error(f"Parquet file not found: s3://{bucket}/{key}")
+        sys.exit(1)
     except ClientError as e:
         error_code = e.response['Error']['Code']
         if error_code == 'NoSuchKey':
@@ -130,6 +458,11 @@ def read_parquet_from_s3(s3_client, bucket, key, max_rows=None):
             logging.error(f"S3 bucket not found: {bucket}")
         elif error_code == 'AccessDenied':
             logging.error(f"Access denied to s3://{bucket}/{key}. Check your permissions.")
+        elif error_code in ('InvalidAccessKeyId', 'SignatureDoesNotMatch'):
+            logging.error(f"AWS credentials were rejected ({error_code}). "
+                          f"Check your access key and secret key.")
+        elif error_code == 'ExpiredToken':
+            logging.error("AWS session token has expired. Refresh your credentials.")
         else:
             logging.error(f"S3 error: {e}")
         sys.exit(1)
@@ -137,43 +470,82 @@ def read_parquet_from_s3(s3_client, bucket, key, max_rows=None):
         logging.error(f"Error reading parquet file: {e}")
         sys.exit(1)
 
-def display_dataframe_info(df, show_rows=10):
+def table_to_pandas(table):
     """
-    Display information about the DataFrame and its first N rows.
-    
+    Convert a pyarrow Table to pandas without exploding string memory.
+
+    On pandas >= 2.0 the columns are backed by Arrow buffers
+    (pd.ArrowDtype), so string columns keep their raw UTF-8 bytes plus
+    offsets instead of one boxed Python str per value - a 4-8x saving on
+    the string-heavy AIS columns (vessel names, callsigns, status).
+    Older pandas falls back to the NumPy conversion, with split_blocks
+    and self_destruct to cap the peak at roughly one copy.
+
     Args:
-        df: pandas DataFrame
+        table: pyarrow Table
+
+    Returns:
+        pandas.DataFrame
+    """
+    import pandas as pd
+
+    if int(pd.__version__.split('.')[0]) >= 2:
+        return table.to_pandas(types_mapper=pd.ArrowDtype)
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+def display_dataframe_info(table, show_rows=10):
+    """
+    Display information about the table and its first N rows.
+
+    Works directly on the Arrow table: row count, byte size and null
+    counts all come from Arrow metadata without scanning the data, and
+    only the printed head slice is ever materialized as Python objects.
+
+    Args:
+        table: pyarrow Table
         show_rows: Number of rows to display
     """
+    import pyarrow as pa
+
     print(f"\n{'='*80}")
-    print(f"DATAFRAME INFORMATION")
+    print(f"TABLE INFORMATION")
     print(f"{'='*80}")
-    print(f"Shape: {df.shape[0]:,} rows × {df.shape[1]} columns")
-    print(f"Memory usage: {df.memory_usage(deep=True).sum() / 1024**2:.2f} MB")
-    
+    print(f"Shape: {table.num_rows:,} rows × {table.num_columns} columns")
+    print(f"Memory usage: {table.nbytes / 1024**2:.2f} MB")
+    logging.debug(f"Arrow pool bytes allocated: {pa.default_memory_pool().bytes_allocated():,}")
+
     print(f"\n{'='*80}")
     print(f"COLUMN INFORMATION")
     print(f"{'='*80}")
-    print(f"{'Column':<30} {'Type':<15} {'Non-Null Count':<15} {'Null Count':<15}")
-    print(f"{'-'*75}")
-    for col in df.columns:
-        non_null = df[col].count()
-        null_count = len(df) - non_null
-        print(f"{col:<30} {str(df[col].dtype):<15} {non_null:<15,} {null_count:<15,}")
-    
+    # Gather all per-column stats in one pass over Arrow metadata (each
+    # null_count is precomputed, no data scan), then loop only to print
+    names = [field.name for field in table.schema]
+    type_strs = [str(field.type) for field in table.schema]
+    null_counts = [column.null_count for column in table.columns]
+    num_rows = table.num_rows
+
+    # Size the columns to the actual content - fixed widths silently
+    # truncate long AIS names like navigational_status_description
+    name_width = max([30] + [len(name) + 2 for name in names])
+    type_width = max([15] + [len(type_str) + 2 for type_str in type_strs])
+
+    print(f"{'Column':<{name_width}} {'Type':<{type_width}} {'Non-Null Count':<15} {'Null Count':<15}")
+    print(f"{'-' * (name_width + type_width + 32)}")
+    for name, type_str, null_count in zip(names, type_strs, null_counts):
+        print(f"{name:<{name_width}} {type_str:<{type_width}} {num_rows - null_count:<15,} {null_count:<15,}")
+
     print(f"\n{'='*80}")
-    print(f"FIRST {min(show_rows, len(df))} ROWS")
+    print(f"FIRST {min(show_rows, table.num_rows)} ROWS")
     print(f"{'='*80}")
-    
-    # Display first N rows with proper formatting
-    pd.set_option('display.max_columns', None)
-    pd.set_option('display.width', None)
-    pd.set_option('display.max_colwidth', 50)
-    
-    print(df.head(show_rows).to_string(index=True))
-    
-    if len(df) > show_rows:
-        print(f"\n... and {len(df) - show_rows:,} more rows")
+
+    # Materialize only the head slice as plain Python rows; for a
+    # 10-row preview this skips pandas' formatter and dtype machinery
+    from tabulate import tabulate
+    rows = table.slice(0, show_rows).to_pylist()
+    print(tabulate(rows, headers='keys', showindex=True))
+
+    if table.num_rows > show_rows:
+        print(f"\n... and {table.num_rows - show_rows:,} more rows")
 
 def main():
     """Main function."""
@@ -195,6 +567,11 @@ Examples:
     
     parser.add_argument('s3_url', help='S3 URL of the parquet file (e.g., s3://bucket/path/file.parquet)')
     parser.add_argument('--rows', '-r', type=int, default=10, help='Number of rows to display (default: 10)')
+    parser.add_argument('--columns', '-c', nargs='+',
+                       help='Only read these columns (default: all columns)')
+    parser.add_argument('--filter', dest='filter_expr', metavar='EXPR',
+                       help="Row filter pushed down to the parquet reader, "
+                            "e.g. 'mmsi == 123456789' (default: no filter)")
     parser.add_argument('--aws-mode', choices=['profile', 'role'], default='profile', 
                        help='AWS authentication mode (default: profile)')
     parser.add_argument('--aws-profile', default='default', 
@@ -210,6 +587,8 @@ Examples:
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
     setup_logging()
+    setup_memory_pool()
+    setup_thread_pools()
     
     try:
         # Parse S3 URL
@@ -220,10 +599,11 @@ Examples:
         s3_client = get_s3_client(args.aws_mode, args.aws_profile, args.region)
         
         # Read parquet file
-        df = read_parquet_from_s3(s3_client, bucket, key, args.rows)
-        
+        table = read_parquet_from_s3(s3_client, bucket, key, args.rows, args.region,
+                                     args.columns, args.filter_expr)
+
         # Display information
-        display_dataframe_info(df, args.rows)
+        display_dataframe_info(table, args.rows)
         
         logging.info("Script completed successfully")
         